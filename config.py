@@ -36,6 +36,16 @@ SEUIL_CRITIQUE  = 80   # Mémo auto-généré + alerte immédiate
 SEUIL_VIGILANCE = 60   # Ajouté en liste de surveillance active
 SEUIL_RADAR     = 40   # Surveillance passive
 
+# Les signaux RADAR (surveillance passive, rarement consultés) partent par
+# défaut dans un fichier JSONL local au lieu de la base — économise un
+# aller-retour Supabase par entrée. Passe à True pour tout garder en base.
+WRITE_RADAR_TO_DB = False
+
+# Compression zstd du texte brut avant envoi à Supabase (~3-5× moins de
+# bande passante). Nécessite une colonne `raw_text_zstd bytea` sur la
+# table `signaux` — laisse à False tant qu'elle n'existe pas.
+COMPRESS_RAW_TEXT = False
+
 # ─── SECTEURS PRIORITAIRES ───────────────────────────────────────────────────
 SECTEURS_PRIORITAIRES = [
     "distribution",
@@ -1,4 +1,6 @@
-import sys, os, schedule, time
+import sys, os, schedule, time, unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from datetime import datetime
 from loguru import logger
 from scrapers.ompic import OmpicScraper
@@ -6,52 +8,108 @@ from scrapers.presse import PresseEcoScraper
 from scrapers.bulletin_officiel import BulletinOfficielScraper
 from scrapers.conseil_concurrence import ConseilConcurrenceScraper
 from scoring.engine import ScoringEngine
-from config import HEURE_SCAN_QUOTIDIEN
+from config import HEURE_SCAN_QUOTIDIEN, WRITE_RADAR_TO_DB, COMPRESS_RAW_TEXT
 from supabase import create_client
+import orjson
+
+if COMPRESS_RAW_TEXT:
+    import zstandard
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
 logger.remove()
-logger.add(sys.stdout, format="<green>{time:HH:mm:ss}</green> | {message}", level="INFO")
+# enqueue=True : les écritures de log partent dans une file de fond,
+# logger.info() rend la main immédiatement au lieu de bloquer sur l'I/O.
+logger.add(sys.stdout, format="<green>{time:HH:mm:ss}</green> | {message}", level="INFO", enqueue=True)
+logger.add("logs/radar_{time:YYYY-MM-DD}.log", format="{time:HH:mm:ss} | {level} | {message}",
+           level="INFO", enqueue=True, rotation="1 day", retention="30 days", buffering=8192)
 
+@lru_cache(maxsize=1)
 def get_supabase():
+    # Client mémoïsé : en mode --schedule, chaque run_pipeline réutilise
+    # la même connexion (pool HTTP + TLS) au lieu d'en recréer une.
     if not SUPABASE_URL or not SUPABASE_KEY:
         return None
     return create_client(SUPABASE_URL, SUPABASE_KEY)
 
-def save_opp(sb, s):
-    if not sb: return
-    try:
-        sb.table("opportunites").upsert({
-            "entreprise": s.get("entreprise") or s.get("titre","N/A")[:50],
-            "secteur": s.get("secteur","N/A"),
-            "score_final": s.get("score_final",0),
-            "niveau_alerte": s.get("niveau_alerte","RADAR"),
-            "type_deal": s.get("type_deal_probable","inconnu"),
-            "source": s.get("source","N/A"),
-            "signaux": s.get("signaux_identifies",[]),
-            "recommandation": s.get("recommandation",""),
-            "memo_origination": s.get("memo_origination",""),
-            "statut": "nouveau",
-        }, on_conflict="entreprise").execute()
-        logger.success(f"   💾 {s.get('entreprise','?')} → {s.get('score_final',0)}/100")
-    except Exception as e:
-        logger.error(f"   ❌ {e}")
-
-def save_signal(sb, s):
-    if not sb: return
-    try:
-        sb.table("signaux").insert({
-            "source": s.get("source","N/A"),
-            "titre": s.get("titre",s.get("raw_text","N/A"))[:200],
-            "entreprise": s.get("entreprise"),
-            "signal_type": s.get("signal_type","N/A"),
-            "score_ia": s.get("score_ia",0),
-            "url": s.get("url",""),
-            "raw_text": s.get("raw_text","")[:500],
-        }).execute()
-    except: pass
+# Taille max d'un lot d'écriture Supabase (limite de payload PostgREST)
+TAILLE_LOT_DB = 500
+
+def _cle_dedup(s):
+    """Clé de déduplication normalisée, calculée une seule fois par signal.
+
+    casefold + décomposition NFKD : « Société Générale » et « societe
+    generale » tombent sur la même clé malgré accents et casse.
+    """
+    cle = s.get("_dedup_key")
+    if cle is None:
+        brut = s.get("entreprise","") or s.get("titre","")[:50]
+        cle = "".join(c for c in unicodedata.normalize("NFKD", brut.casefold().strip())
+                      if not unicodedata.combining(c))
+        s["_dedup_key"] = cle
+    return cle
+
+def _ligne_opp(s):
+    return {
+        "entreprise": s.get("entreprise") or s.get("titre","N/A")[:50],
+        "secteur": s.get("secteur","N/A"),
+        "score_final": s.get("score_final",0),
+        "niveau_alerte": s.get("niveau_alerte","RADAR"),
+        "type_deal": s.get("type_deal_probable","inconnu"),
+        "source": s.get("source","N/A"),
+        "signaux": s.get("signaux_identifies",[]),
+        "recommandation": s.get("recommandation",""),
+        "memo_origination": s.get("memo_origination",""),
+        "statut": "nouveau",
+    }
+
+def _ligne_signal(s):
+    ligne = {
+        "source": s.get("source","N/A"),
+        "titre": s.get("titre",s.get("raw_text","N/A"))[:200],
+        "entreprise": s.get("entreprise"),
+        "signal_type": s.get("signal_type","N/A"),
+        "score_ia": s.get("score_ia",0),
+        "url": s.get("url",""),
+    }
+    brut = s.get("raw_text","")[:500]
+    if COMPRESS_RAW_TEXT:
+        # bytea PostgREST au format hex — décompressé côté lecteurs, pas ici
+        ligne["raw_text_zstd"] = "\\x" + zstandard.compress(brut.encode("utf-8"), 3).hex()
+    else:
+        ligne["raw_text"] = brut
+    return ligne
+
+def _ecrire_lots(requete, lignes):
+    """Écrit les lignes par lots ; en cas d'échec d'un lot, retombe ligne par ligne."""
+    for debut in range(0, len(lignes), TAILLE_LOT_DB):
+        lot = lignes[debut:debut + TAILLE_LOT_DB]
+        try:
+            requete(lot).execute()
+        except Exception as e:
+            logger.error(f"   ❌ Lot de {len(lot)} lignes refusé — retry unitaire ({e})")
+            for ligne in lot:
+                try: requete([ligne]).execute()
+                except Exception: pass
+
+def save_opps(sb, signaux):
+    if not sb or not signaux: return
+    _ecrire_lots(lambda rows: sb.table("opportunites").upsert(rows, on_conflict="entreprise"), [_ligne_opp(s) for s in signaux])
+    logger.success(f"   💾 {len(signaux)} opportunités sauvegardées")
+
+def save_signaux(sb, signaux):
+    if not sb or not signaux: return
+    _ecrire_lots(lambda rows: sb.table("signaux").insert(rows), [_ligne_signal(s) for s in signaux])
+
+def save_radar_local(signaux):
+    """Sink local append-only pour les signaux RADAR — une seule écriture bufferisée."""
+    if not signaux: return
+    os.makedirs("output", exist_ok=True)
+    chemin = f"output/radar_{datetime.now():%Y-%m-%d}.jsonl"
+    with open(chemin, "ab") as f:
+        f.write(b"".join(orjson.dumps(_ligne_opp(s)) + b"\n" for s in signaux))
+    logger.info(f"   📁 {len(signaux)} signaux RADAR → {chemin}")
 
 def run_pipeline():
     debut = datetime.now()
@@ -60,18 +118,24 @@ def run_pipeline():
     logger.info(f"🚀 M&A RADAR MAROC — {debut.strftime('%d/%m/%Y à %H:%M')}")
     logger.info("="*60)
 
+    # Les 4 scrapers sont I/O-bound sur des domaines distincts :
+    # on les lance en parallèle, le temps total = le plus lent des 4.
     tous = []
-    for nom, Cls in [("OMPIC",OmpicScraper),("Presse RSS",PresseEcoScraper),("Bulletin Officiel",BulletinOfficielScraper),("Conseil Concurrence",ConseilConcurrenceScraper)]:
-        try:
-            sigs = Cls().run()
-            tous.extend(sigs)
-            logger.info(f"   {nom:<28} → {len(sigs)} signaux")
-        except Exception as e:
-            logger.error(f"   {nom} → ERREUR: {e}")
+    sources = [("OMPIC",OmpicScraper),("Presse RSS",PresseEcoScraper),("Bulletin Officiel",BulletinOfficielScraper),("Conseil Concurrence",ConseilConcurrenceScraper)]
+    with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+        futures = {executor.submit(Cls().run): nom for nom, Cls in sources}
+        for future in as_completed(futures):
+            nom = futures[future]
+            try:
+                sigs = future.result()
+                tous.extend(sigs)
+                logger.info(f"   {nom:<28} → {len(sigs)} signaux")
+            except Exception as e:
+                logger.error(f"   {nom} → ERREUR: {e}")
 
     vus, uniques = set(), []
     for s in tous:
-        k = (s.get("entreprise","") or s.get("titre","")[:50]).lower().strip()
+        k = _cle_dedup(s)
         if k and k not in vus:
             vus.add(k); uniques.append(s)
 
@@ -81,15 +145,22 @@ def run_pipeline():
 
     crit, vig, rad = [], [], []
     for s in scores:
-        save_signal(sb, s)
         n = s.get("niveau_alerte","FAIBLE")
         if n == "CRITIQUE":
-            s["memo_origination"] = engine.generer_memo(s)
-            save_opp(sb, s); crit.append(s)
+            s["memo_origination"] = engine.generer_memo(s, sb)
+            crit.append(s)
         elif n == "VIGILANCE":
-            save_opp(sb, s); vig.append(s)
+            vig.append(s)
         elif n == "RADAR":
-            save_opp(sb, s); rad.append(s)
+            rad.append(s)
+
+    # 2 écritures groupées au lieu de 2 aller-retours HTTP par signal
+    save_signaux(sb, scores)
+    if WRITE_RADAR_TO_DB:
+        save_opps(sb, crit + vig + rad)
+    else:
+        save_opps(sb, crit + vig)
+        save_radar_local(rad)
 
     logger.info(f"\n🔴 CRITIQUES: {len(crit)} | 🟠 VIGILANCES: {len(vig)} | 🟡 RADAR: {len(rad)}")
 
@@ -98,6 +169,9 @@ if __name__ == "__main__":
         schedule.every(1).hours.do(run_pipeline)
         run_pipeline()
         while True:
-            schedule.run_pending(); time.sleep(60)
+            # Dormir directement jusqu'au prochain job au lieu de se
+            # réveiller toutes les 60 s pour vérifier s'il est dû.
+            time.sleep(max(1, (schedule.next_run() - datetime.now()).total_seconds()))
+            schedule.run_pending()
     else:
         run_pipeline()
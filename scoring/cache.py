@@ -0,0 +1,65 @@
+"""
+M&A Radar Maroc — Cache local des scores IA
+La fenêtre M&A d'une cible s'étale sur des semaines : les scrapers
+ressortent donc souvent le même signal d'un scan à l'autre. Chaque
+re-scoring Gemini d'un texte déjà vu est du token brûlé pour rien —
+on garde les résultats dans un fichier local et on les réutilise.
+"""
+
+import hashlib
+import os
+import time
+
+import orjson
+from loguru import logger
+
+
+class ScoreCache:
+    """
+    Cache exact-match : clé = empreinte sha1 du texte normalisé du signal
+    (titre + raw_text, casse/espaces/ponctuation ignorés), valeur = les
+    champs produits par l'IA. Persisté en un seul fichier JSON.
+    """
+
+    def __init__(self, chemin="cache/scores.json", ttl_jours=7):
+        self.chemin = chemin
+        self.ttl = ttl_jours * 86400
+        self._donnees = {}
+        self._charger()
+
+    @staticmethod
+    def cle(signal: dict) -> str:
+        """Empreinte du contenu du signal, insensible à la casse et à la ponctuation."""
+        texte = f"{signal.get('titre','')}{signal.get('raw_text','')}"
+        normalise = "".join(c for c in texte.casefold() if c.isalnum())
+        return hashlib.sha1(normalise.encode("utf-8")).hexdigest()
+
+    def chercher(self, signal: dict):
+        """Retourne les champs IA en cache pour ce signal, ou None."""
+        entree = self._donnees.get(self.cle(signal))
+        if entree and time.time() - entree["ts"] < self.ttl:
+            return entree["resultat"]
+        return None
+
+    def stocker(self, signal: dict, resultat: dict):
+        self._donnees[self.cle(signal)] = {"ts": time.time(), "resultat": resultat}
+
+    def _charger(self):
+        try:
+            with open(self.chemin, "rb") as f:
+                donnees = orjson.loads(f.read())
+            maintenant = time.time()
+            self._donnees = {k: v for k, v in donnees.items() if maintenant - v["ts"] < self.ttl}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.debug(f"   ScoreCache chargement — {e}")
+
+    def sauvegarder(self):
+        """Une seule écriture bufferisée en fin de batch."""
+        try:
+            os.makedirs(os.path.dirname(self.chemin), exist_ok=True)
+            with open(self.chemin, "wb") as f:
+                f.write(orjson.dumps(self._donnees))
+        except Exception as e:
+            logger.debug(f"   ScoreCache écriture — {e}")
@@ -1,13 +1,22 @@
 """
 M&A Radar Maroc — Scoring Engine (Gemini API - Batch Mode)
-Au lieu d'appeler Gemini 43 fois, on envoie tout en 1 seul appel.
-43 appels → 1 appel = quota quasi illimité.
+Au lieu d'appeler Gemini une fois par signal, les signaux passent un
+filtre local (bruit + pré-score), puis le cache de scores, et seuls les
+restants partent en lots de TAILLE_LOT scorés en parallèle — une
+poignée d'appels par scan au lieu de plusieurs dizaines.
 """
 
 import os
-import json
+import hashlib
+import re
+import orjson
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from loguru import logger
+from config import SCORING_WEIGHTS, SEUIL_RADAR
+from scoring.cache import ScoreCache
+from scoring.matcher import build_automaton, find_keywords
 
 GEMINI_KEY = os.getenv("GEMINI_API_KEY", "COLLE-TA-CLÉ-ICI")
 GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
@@ -37,33 +46,83 @@ CONTEXTE_MAROC = [
 ]
 
 
-def filtrer_signal(texte: str) -> bool:
-    """Filtre rapide — élimine le bruit évident avant d'appeler l'IA."""
-    if not texte or len(texte) < 20:
+# Premier tableau JSON de la réponse, backticks markdown ou pas
+_JSON_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
+
+# Grille de pondération formatée une fois pour toutes — SCORING_WEIGHTS est
+# de la config immuable, inutile de la re-joindre à chaque instanciation
+_POIDS_STR = "\n".join(f"  - {k}: {v} points" for k, v in SCORING_WEIGHTS.items())
+
+# Automates compilés une fois — un passage linéaire sur le texte par liste
+# au lieu d'un scan Python par mot-clé
+_AC_SIGNAL_FORT = build_automaton((s, s) for s in SIGNAL_FORT)
+_AC_BRUIT       = build_automaton((b, b) for b in BRUIT)
+_AC_CONTEXTE    = build_automaton((m, m) for m in CONTEXTE_MAROC)
+
+
+def filtrer_signal(texte_min: str) -> bool:
+    """
+    Filtre rapide — élimine le bruit évident avant d'appeler l'IA.
+    Attend un texte déjà passé en minuscules (un seul .lower() par signal,
+    partagé avec le pré-score).
+    """
+    # Un fragment de moins de 40 caractères (cellule de tableau vide,
+    # boilerplate) ne porte jamais assez de contexte pour être scoré
+    if not texte_min or len(texte_min) < 40:
         return False
-    t = texte.lower()
     # Exclure bruit
-    if any(b in t for b in BRUIT):
+    if next(_AC_BRUIT.iter(texte_min), None) is not None:
         return False
     # Garder si signal M&A OU contexte marocain
-    has_signal = any(s in t for s in SIGNAL_FORT)
-    has_maroc  = any(m in t for m in CONTEXTE_MAROC)
-    return has_signal or has_maroc
+    return (next(_AC_SIGNAL_FORT.iter(texte_min), None) is not None
+            or next(_AC_CONTEXTE.iter(texte_min), None) is not None)
+
+
+# En dessous de ce pré-score local, inutile de dépenser des tokens IA :
+# le signal finirait de toute façon sous SEUIL_RADAR.
+SEUIL_PRE_SCORE = SEUIL_RADAR * 0.5
+
+
+def pre_scorer(signal: dict, texte_min: str) -> float:
+    """
+    Pré-score heuristique local : poids de la grille pour le type de signal
+    détecté par le scraper + bonus par mot-clé M&A présent dans le texte
+    (déjà en minuscules). Sert uniquement à écarter le bruit évident avant
+    l'appel IA.
+    """
+    score = SCORING_WEIGHTS.get(signal.get("signal_type"), 0)
+    score += 4 * len(find_keywords(texte_min))
+    return score
+
+
+# Session singleton vers l'API Gemini : les lots concurrents réutilisent
+# la même connexion TLS keep-alive au lieu d'une poignée de main par appel
+_SESSION_GEMINI = None
+
+
+def _get_session_gemini():
+    global _SESSION_GEMINI
+    if _SESSION_GEMINI is None:
+        _SESSION_GEMINI = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        _SESSION_GEMINI.mount("https://", adapter)
+    return _SESSION_GEMINI
 
 
 def appeler_gemini(prompt: str, max_tokens: int = 4000) -> str:
     """Appelle Gemini 2.0 Flash."""
     try:
-        response = requests.post(
+        # Sérialisation orjson (extension Rust) au lieu du json stdlib
+        response = _get_session_gemini().post(
             f"{GEMINI_URL}?key={GEMINI_KEY}",
             headers={"Content-Type": "application/json"},
-            json={
+            data=orjson.dumps({
                 "contents": [{"parts": [{"text": prompt}]}],
                 "generationConfig": {
                     "maxOutputTokens": max_tokens,
                     "temperature": 0.2,
                 }
-            },
+            }),
             timeout=60
         )
         if response.status_code != 200:
@@ -82,31 +141,138 @@ class ScoringEngine:
     SEUIL_VIGILANCE = 50
     SEUIL_RADAR     = 30
 
+    # Taille max d'un lot par appel Gemini — au-delà, le JSON de sortie
+    # risque d'être tronqué par maxOutputTokens.
+    TAILLE_LOT = 40
+
+    # Champs produits par l'IA, réutilisables d'un scan à l'autre
+    CHAMPS_IA = ("score_final", "score_ia", "niveau_alerte", "type_deal_probable",
+                 "entreprise", "secteur", "signaux_identifies", "recommandation")
+
+    def __init__(self):
+        self.cache = ScoreCache()
+        # Préfixe statique du prompt, construit une seule fois.
+        # Placé en TÊTE du prompt (les signaux arrivent à la fin) pour que
+        # le préfixe reste identique octet par octet d'un appel à l'autre —
+        # condition pour bénéficier du cache de prompt implicite de Gemini.
+        self._prompt_static = f"""Tu es un banquier M&A senior spécialisé sur le marché marocain (PME, family businesses).
+
+Analyse les signaux fournis en fin de message et retourne UNIQUEMENT un tableau JSON valide.
+Pas de texte avant, pas de texte après, pas de backticks.
+
+Retourne ce tableau JSON avec un objet par signal:
+[
+  {{
+    "index": 0,
+    "pertinent_ma": true,
+    "score_final": 75,
+    "niveau_alerte": "CRITIQUE",
+    "type_deal_probable": "acquisition",
+    "entreprise": "Nom SA",
+    "secteur": "Distribution",
+    "signaux_identifies": ["transmission_succession", "besoin_cash_bfr"],
+    "recommandation": "Contacter le fondateur cette semaine."
+  }},
+  ...
+]
+
+Règles de scoring:
+- 75-100 = CRITIQUE : deal imminent, action urgente
+- 50-74  = VIGILANCE : signal fort, surveiller
+- 30-49  = RADAR : signal modéré
+- 0-29   = FAIBLE : bruit, pas pertinent
+
+Grille de pondération indicative (importance relative de chaque signal):
+{_POIDS_STR}
+
+Types de signaux: {", ".join(SCORING_WEIGHTS)}
+
+Si un signal n'est pas lié au M&A marocain → pertinent_ma: false, score_final: 0, niveau_alerte: "FAIBLE"
+"""
+
+        # Préfixe statique du prompt mémo : persona + structure en tête,
+        # les champs du signal arrivent en fin de prompt. Même logique que
+        # le prompt de scoring — préfixe stable, cachable côté fournisseur.
+        self._memo_static = """Tu es un banquier M&A senior. Rédige un mémo d'origination professionnel et concis sur l'entreprise décrite en fin de message.
+
+Structure (max 200 mots):
+1. SITUATION — contexte de l'entreprise
+2. SIGNAL DÉTECTÉ — ce qui a été observé
+3. THÈSE D'OPÉRATION — type de deal probable et logique stratégique
+4. PROCHAINE ÉTAPE — action concrète cette semaine
+
+Ton: professionnel, direct, actionnable."""
+
     def analyser_batch(self, signaux: list) -> list:
         """
-        Score TOUS les signaux en UN SEUL appel Gemini.
-        43 signaux = 1 appel au lieu de 43.
+        Score les signaux en lots : filtre rapide local, reprise des scores
+        déjà en cache, puis lots de TAILLE_LOT envoyés à Gemini en
+        parallèle — un appel par lot, pas par signal.
         """
         if not signaux:
             return []
 
-        # Étape 1 — Filtre rapide
-        filtres_avant = []
+        # Étape 1 — Filtre rapide + pré-score local (zéro token IA)
+        filtres_avant, nb_bruit, nb_pre_score = [], 0, 0
         for s in signaux:
-            texte = f"{s.get('titre','')} {s.get('raw_text','')}"
-            if filtrer_signal(texte):
-                filtres_avant.append(s)
-            else:
-                logger.debug(f"   ⛔ Filtré: {texte[:60]}")
-
-        logger.info(f"   🔍 {len(signaux)} signaux → {len(filtres_avant)} après filtre rapide")
+            # Un seul .lower() par signal, partagé par le filtre et le pré-score
+            texte = f"{s.get('titre','')} {s.get('raw_text','')}".lower()
+            # opt(lazy=True) : le formatage n'a lieu que si le niveau DEBUG
+            # est actif — zéro f-string construite en fonctionnement normal
+            if not filtrer_signal(texte):
+                nb_bruit += 1
+                logger.opt(lazy=True).debug("   ⛔ Filtré: {}", lambda t=texte: t[:60])
+                continue
+            if pre_scorer(s, texte) < SEUIL_PRE_SCORE:
+                nb_pre_score += 1
+                logger.opt(lazy=True).debug("   ⛔ Pré-score trop faible: {}", lambda t=texte: t[:60])
+                continue
+            filtres_avant.append(s)
+
+        logger.info(f"   🔍 {len(signaux)} signaux → {len(filtres_avant)} après filtre rapide "
+                    f"({nb_bruit} bruit, {nb_pre_score} pré-score)")
 
         if not filtres_avant:
             logger.info("   ℹ️ Aucun signal pertinent après filtrage")
             return []
 
-        # Étape 2 — Batch scoring en 1 seul appel Gemini
-        resultats = self._batch_score(filtres_avant)
+        # Étape 1 bis — Cache local : les signaux déjà scorés lors d'un scan
+        # précédent récupèrent leur résultat sans repasser par Gemini
+        a_scorer, resultats = [], []
+        for s in filtres_avant:
+            en_cache = self.cache.chercher(s)
+            if en_cache:
+                reutilise = s.copy()
+                reutilise.update(en_cache)
+                resultats.append(reutilise)
+            else:
+                a_scorer.append(s)
+        if resultats:
+            logger.info(f"   ♻️ {len(resultats)} signaux repris du cache, {len(a_scorer)} à scorer")
+
+        # Étape 2 — Batch scoring par lots (1 appel Gemini par lot de TAILLE_LOT),
+        # lots indépendants lancés en parallèle
+        lots = [a_scorer[d:d + self.TAILLE_LOT]
+                for d in range(0, len(a_scorer), self.TAILLE_LOT)]
+        nouveaux = []
+        if len(lots) == 1:
+            nouveaux = self._batch_score(lots[0])
+        elif lots:
+            with ThreadPoolExecutor(max_workers=min(4, len(lots))) as executor:
+                futures = [executor.submit(self._batch_score, lot) for lot in lots]
+                for i, future in enumerate(futures):
+                    # Un lot en échec ne doit pas faire perdre les autres
+                    try:
+                        nouveaux.extend(future.result())
+                    except Exception as e:
+                        logger.error(f"   ❌ Lot {i+1}/{len(lots)} perdu — {e}")
+
+        # Alimenter le cache avec les scores fraîchement payés
+        for r in nouveaux:
+            self.cache.stocker(r, {k: r.get(k) for k in self.CHAMPS_IA})
+        if nouveaux:
+            self.cache.sauvegarder()
+        resultats.extend(nouveaux)
 
         # Étape 3 — Stats
         critiques  = sum(1 for r in resultats if r.get("niveau_alerte") == "CRITIQUE")
@@ -125,39 +291,10 @@ class ScoringEngine:
             texte = f"{s.get('titre', '')} {s.get('raw_text', '')}".strip()[:300]
             liste_signaux += f"\n[{i}] Source:{s.get('source','N/A')} | {texte}"
 
-        prompt = f"""Tu es un banquier M&A senior spécialisé sur le marché marocain (PME, family businesses).
-
-Analyse ces {len(signaux)} signaux et retourne UNIQUEMENT un tableau JSON valide.
-Pas de texte avant, pas de texte après, pas de backticks.
-
-SIGNAUX À ANALYSER:
+        # Préfixe statique en tête, partie variable (les signaux) à la fin.
+        prompt = f"""{self._prompt_static}
+SIGNAUX À ANALYSER ({len(signaux)}):
 {liste_signaux}
-
-Retourne ce tableau JSON avec un objet par signal:
-[
-  {{
-    "index": 0,
-    "pertinent_ma": true,
-    "score_final": 75,
-    "niveau_alerte": "CRITIQUE",
-    "type_deal_probable": "acquisition",
-    "entreprise": "Nom SA",
-    "secteur": "Distribution",
-    "signaux_identifies": ["transmission_succession", "besoin_cash_bfr"],
-    "recommandation": "Contacter le fondateur cette semaine."
-  }},
-  ...
-]
-
-Règles de scoring:
-- 75-100 = CRITIQUE : deal imminent, action urgente
-- 50-74  = VIGILANCE : signal fort, surveiller
-- 30-49  = RADAR : signal modéré
-- 0-29   = FAIBLE : bruit, pas pertinent
-
-Types de signaux: transmission_succession, acquereur_actif_secteur, desinvestissement_activite, besoin_cash_bfr, gearing_eleve, changement_direction, expansion_geographique, consolidation_sectorielle, investissements_recents, recrutement_profil_ma
-
-Si un signal n'est pas lié au M&A marocain → pertinent_ma: false, score_final: 0, niveau_alerte: "FAIBLE"
 """
 
         reponse = appeler_gemini(prompt, max_tokens=4000)
@@ -167,16 +304,14 @@ Si un signal n'est pas lié au M&A marocain → pertinent_ma: false, score_final
             return []
 
         try:
-            # Nettoyer le JSON
-            clean = reponse.strip()
-            if "```" in clean:
-                parts = clean.split("```")
-                for p in parts:
-                    if "[" in p and "{" in p:
-                        clean = p.replace("json", "").strip()
-                        break
+            # Extraire le tableau JSON, robuste aux variations markdown
+            m = _JSON_ARRAY_RE.search(reponse)
+            if not m:
+                logger.error("   ❌ Pas de tableau JSON dans la réponse Gemini")
+                logger.debug(f"   Réponse brute: {reponse[:300]}")
+                return []
 
-            scores_ia = json.loads(clean)
+            scores_ia = orjson.loads(m.group(0))
 
             # Fusionner avec les données originales
             resultats = []
@@ -193,44 +328,84 @@ Si un signal n'est pas lié au M&A marocain → pertinent_ma: false, score_final
                     continue
 
                 signal_original = signaux[idx]
-                resultats.append({
-                    **signal_original,
-                    "score_final":        score.get("score_final", 0),
-                    "score_ia":           score.get("score_final", 0),
-                    "niveau_alerte":      niveau,
-                    "type_deal_probable": score.get("type_deal_probable", "inconnu"),
-                    "entreprise":         score.get("entreprise") or signal_original.get("entreprise"),
-                    "secteur":            score.get("secteur", signal_original.get("secteur", "N/A")),
-                    "signaux_identifies": score.get("signaux_identifies", []),
-                    "recommandation":     score.get("recommandation", ""),
-                })
+                # copy() + update() plutôt que {**a, **b} : une seule
+                # allocation de dict au lieu d'une reconstruction complète
+                enrichi = signal_original.copy()
+                enrichi.update(
+                    score_final=score.get("score_final", 0),
+                    score_ia=score.get("score_final", 0),
+                    niveau_alerte=niveau,
+                    type_deal_probable=score.get("type_deal_probable", "inconnu"),
+                    entreprise=score.get("entreprise") or signal_original.get("entreprise"),
+                    secteur=score.get("secteur", signal_original.get("secteur", "N/A")),
+                    signaux_identifies=score.get("signaux_identifies", []),
+                    recommandation=score.get("recommandation", ""),
+                )
+                resultats.append(enrichi)
 
             logger.info(f"   📊 {len(resultats)}/{len(signaux)} signaux retenus après scoring IA")
             return resultats
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"   ❌ JSON invalide de Gemini: {e}")
             logger.debug(f"   Réponse brute: {reponse[:300]}")
             return []
 
-    def generer_memo(self, signal: dict) -> str:
-        """Génère un mémo d'origination — 1 seul appel Gemini."""
-        prompt = f"""Tu es un banquier M&A senior. Rédige un mémo d'origination professionnel et concis.
+    # Durée de validité d'un mémo en cache — au-delà, on le régénère
+    MEMO_TTL_JOURS = 14
+
+    @staticmethod
+    def _cle_memo(signal: dict) -> str:
+        """Clé de cache content-addressed : entreprise + signaux identifiés."""
+        base = (signal.get("entreprise") or "") + "|" + "|".join(sorted(signal.get("signaux_identifies", [])))
+        return hashlib.blake2b(base.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _memo_depuis_cache(self, sb, cle: str) -> str:
+        """Cherche un mémo encore valide dans la table memo_cache."""
+        try:
+            res = sb.table("memo_cache").select("memo,created_at").eq("cle", cle).limit(1).execute()
+            if res.data:
+                cree = datetime.fromisoformat(res.data[0]["created_at"].replace("Z", "+00:00"))
+                if datetime.now(timezone.utc) - cree < timedelta(days=self.MEMO_TTL_JOURS):
+                    return res.data[0]["memo"]
+        except Exception as e:
+            logger.debug(f"   memo_cache lecture — {e}")
+        return ""
 
+    def generer_memo(self, signal: dict, sb=None) -> str:
+        """
+        Génère un mémo d'origination — 1 seul appel Gemini.
+        Si la même entreprise ressort avec les mêmes signaux d'un scan à
+        l'autre (fenêtre M&A de plusieurs semaines), le mémo est repris du
+        cache au lieu de re-payer des tokens de sortie.
+        """
+        cle = self._cle_memo(signal)
+        if sb:
+            memo = self._memo_depuis_cache(sb, cle)
+            if memo:
+                logger.info(f"   ♻️ Mémo repris du cache — {signal.get('entreprise','?')}")
+                return memo
+
+        prompt = f"""{self._memo_static}
+
+═══ SIGNAL DÉTECTÉ ═══
 Entreprise : {signal.get('entreprise', 'N/A')}
 Secteur    : {signal.get('secteur', 'N/A')}
 Score M&A  : {signal.get('score_final', 0)}/100
 Signaux    : {', '.join(signal.get('signaux_identifies', []))}
 Source     : {signal.get('source', 'N/A')}
-Info brute : {signal.get('raw_text', '')[:400]}
-
-Structure (max 200 mots):
-1. SITUATION — contexte de l'entreprise
-2. SIGNAL DÉTECTÉ — ce qui a été observé
-3. THÈSE D'OPÉRATION — type de deal probable et logique stratégique
-4. PROCHAINE ÉTAPE — action concrète cette semaine
-
-Ton: professionnel, direct, actionnable."""
+Info brute : {signal.get('raw_text', '')[:400]}"""
 
         memo = appeler_gemini(prompt, max_tokens=600)
+        if sb and memo:
+            try:
+                # created_at explicite : le défaut Postgres ne joue qu'à
+                # l'insert, pas quand l'upsert rafraîchit un mémo expiré
+                sb.table("memo_cache").upsert({
+                    "cle": cle,
+                    "memo": memo,
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                }, on_conflict="cle").execute()
+            except Exception as e:
+                logger.debug(f"   memo_cache écriture — {e}")
         return memo or f"Mémo non disponible — Signal via {signal.get('source','N/A')}"
@@ -0,0 +1,97 @@
+"""
+M&A Radar Maroc — Matching de mots-clés via Aho–Corasick
+Un seul passage O(|texte|) sur le texte au lieu d'un scan par mot-clé
+(O(|texte|·|mots-clés|) avec les chaînes de `any(kw in texte ...)`).
+Sans pyahocorasick, repli sur une alternation regex compilée — un seul
+passage du moteur SRE en C, même API .iter().
+"""
+
+import re
+
+from config import MOTS_CLES_MA
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover
+    ahocorasick = None
+
+
+class _AutomateRegex:
+    """
+    Repli quand pyahocorasick n'est pas installé. Expose le sous-ensemble
+    de l'API Automaton utilisé ici : add_word / make_automaton / iter.
+    Une alternation compilée écarte en un passage C les textes sans aucun
+    hit (le cas majoritaire) ; sinon chaque mot-clé est cherché, car comme
+    l'automate il faut rapporter les matchs qui se chevauchent — min() des
+    classifieurs doit voir « apport » même si « apport en numéraire »
+    matche au même endroit.
+    """
+
+    def __init__(self):
+        self._payloads = {}
+        self._regex = None
+
+    def add_word(self, mot, payload):
+        self._payloads[mot] = payload
+
+    def make_automaton(self):
+        self._regex = re.compile("|".join(re.escape(m) for m in self._payloads))
+
+    def iter(self, texte):
+        if self._regex.search(texte) is None:
+            return
+        for mot, payload in self._payloads.items():
+            idx = texte.find(mot)
+            if idx != -1:
+                yield idx + len(mot) - 1, payload
+
+
+def build_automaton(mots_cles):
+    """
+    Compile une séquence de (mot_clé, payload) en automate Aho–Corasick.
+    Les mots-clés sont enregistrés en minuscules ; le texte à scanner doit
+    donc être passé en minuscules lui aussi.
+    """
+    automate = ahocorasick.Automaton() if ahocorasick else _AutomateRegex()
+    for mot, payload in mots_cles:
+        automate.add_word(mot.lower(), payload)
+    automate.make_automaton()
+    return automate
+
+
+def build_classifier(table):
+    """
+    Compile une table de taxonomie ((mots, catégorie), ...) — ordonnée du
+    groupe le plus prioritaire au moins prioritaire — en automate dont les
+    payloads (priorité, catégorie) se départagent par min() : même
+    sémantique que les anciennes cascades de any(), en un seul passage.
+    """
+    return build_automaton(
+        (kw, (priorite, categorie))
+        for priorite, (mots, categorie) in enumerate(table)
+        for kw in mots
+    )
+
+
+# Automate global des mots-clés M&A de la config, compilé une fois à l'import
+_AUTOMATE_MA = build_automaton((m, m) for m in MOTS_CLES_MA)
+
+
+def find_keywords(texte_min):
+    """
+    Retourne les mots-clés M&A distincts présents dans le texte.
+    Attend un texte déjà en minuscules — l'appelant ne paie qu'un .lower().
+    """
+    if not texte_min:
+        return []
+    return list({payload for _, payload in _AUTOMATE_MA.iter(texte_min)})
+
+
+def contient_mot_cle(texte_min):
+    """
+    True si le texte contient au moins un mot-clé M&A (court-circuite au
+    1er hit). Attend un texte déjà en minuscules, comme find_keywords.
+    """
+    if not texte_min:
+        return False
+    return next(_AUTOMATE_MA.iter(texte_min), None) is not None
@@ -0,0 +1,58 @@
+"""
+M&A Radar Maroc — Couche HTTP partagée des scrapers
+Construit la session requests-cache avec pool de connexions keep-alive
+(une poignée de main TLS par hôte, pas par requête) et retries à backoff
+exponentiel sur les codes transitoires.
+
+Le pool de connexions (adapter) et le backend sqlite du cache sont des
+singletons de module : chaque scraper garde sa propre session (en-têtes
+différents par cible) mais tous partagent les mêmes connexions TCP/TLS
+keep-alive et le même store de cache.
+"""
+
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_ADAPTER = None
+_BACKEND = None
+
+
+def _get_adapter():
+    """Adapter singleton — un seul pool keep-alive pour tout le processus."""
+    global _ADAPTER
+    if _ADAPTER is None:
+        # Dimensionné pour le pic : les 4 scrapers tournent en parallèle
+        # et la presse interroge à elle seule 9 hôtes en même temps
+        _ADAPTER = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+            ),
+        )
+    return _ADAPTER
+
+
+def _get_backend():
+    """Backend sqlite singleton — un seul store partagé par les sessions."""
+    global _BACKEND
+    if _BACKEND is None:
+        _BACKEND = requests_cache.backends.SQLiteCache("cache/http_cache")
+    return _BACKEND
+
+
+def build_session():
+    """Session HTTP cachée + pool keep-alive + retries, prête à l'emploi."""
+    session = requests_cache.CachedSession(
+        backend=_get_backend(),
+        expire_after=86400,       # 24h — un scan quotidien
+        cache_control=True,       # honore ETag / Last-Modified / Cache-Control
+        stale_if_error=True,      # site cible down → on sert la version en cache
+    )
+    adapter = _get_adapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -0,0 +1,51 @@
+"""
+M&A Radar Maroc — Base commune des scrapers
+Session HTTP avec cache persistant (requests-cache) : quand une page n'a
+pas changé depuis le dernier scan, le serveur répond 304 et le contenu
+revient du cache local — zéro téléchargement, zéro re-parsing inutile.
+"""
+
+import hashlib
+
+from datetime import datetime
+from loguru import logger
+
+from scrapers._http import build_session
+
+
+class BaseScraper:
+    """
+    Classe mère des scrapers : fournit la session HTTP cachée et la liste
+    de signaux. Chaque scraper fils complète les en-têtes selon sa cible.
+    """
+
+    def __init__(self):
+        self.session = build_session()
+        self.signaux = []
+        # Date du scan, formatée une fois — l'orchestrateur instancie un
+        # scraper neuf par run, inutile de refaire le strftime par signal
+        self._today = datetime.now().strftime("%Y-%m-%d")
+
+    def _dedupliquer(self):
+        """
+        Supprime les doublons de contenu (même annonce trouvée par la page
+        des annonces ET par la recherche par mots-clés, ou dans plusieurs
+        sections). Chaque doublon qui passe coûte un scoring IA en aval.
+        """
+        vus, uniques = set(), []
+        for s in self.signaux:
+            cle = hashlib.sha1(
+                (s.get("titre", "")[:150] + (s.get("entreprise") or "")).encode("utf-8")
+            ).digest()
+            if cle not in vus:
+                vus.add(cle)
+                uniques.append(s)
+        self.signaux = uniques
+
+    def _get_silencieux(self, url, **kwargs):
+        """GET qui renvoie None au lieu de lever — pratique pour les fetchs parallèles."""
+        try:
+            return self.session.get(url, timeout=15, **kwargs)
+        except Exception as e:
+            logger.debug(f"      GET {url} — {e}")
+            return None
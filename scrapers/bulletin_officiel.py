@@ -4,14 +4,74 @@ Source : bulletinofficiel.ma
 Détecte : fusions, cessions, augmentations de capital, dissolutions, appels d'offres
 """
 
-import requests
-from bs4 import BeautifulSoup
+import re
+
+from itertools import islice
+from selectolax.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from loguru import logger
 from config import MOTS_CLES_MA, SECTEURS_PRIORITAIRES
-
-
-class BulletinOfficielScraper:
+from scoring.matcher import build_automaton
+from scrapers.base import BaseScraper
+
+# Patterns courants dans le BO marocain, compilés une fois à l'import
+_ENTREPRISE_PATTERNS = (
+    re.compile(r"(?:société|SARL|SA|SAS|SNC|GIE)\s+([A-Z][A-Za-z\s&'-]+?)(?:\s+au capital|\s+dont|\s+ayant|\,)"),
+    re.compile(r"([A-Z][A-Z\s&'-]{3,40})\s+(?:SARL|SA|SAS|SNC)"),
+)
+
+# Groupes de classification, dans l'ordre de priorité (le 1er groupe
+# qui matche l'emporte — même sémantique que l'ancienne cascade de any())
+_CLASSES_BO = (
+    (("fusion", "absorption", "apport"), "acquereur_actif_secteur"),
+    (("cession", "vente", "transfert"), "desinvestissement_activite"),
+    (("augmentation de capital", "apport en numéraire"), "besoin_cash_bfr"),
+    (("dissolution", "liquidation"), "desinvestissement_activite"),
+    (("transformation", "scission"), "transmission_succession"),
+)
+
+
+
+# Signaux de test du mode dégradé — gabarits figés à l'import, la date
+# du scan et l'URL de base sont injectées à l'appel
+_DONNEES_TEST = (
+    {
+        "source": "Bulletin Officiel",
+        "entreprise": "ATLAS DISTRIBUTION SA",
+        "titre": "Projet de fusion-absorption de Atlas Distribution SA par Retail Maroc Group",
+        "raw_text": "Avis de fusion — Atlas Distribution SA — Distribution alimentaire — Casablanca",
+        "signal_type": "acquereur_actif_secteur",
+        "score_initial": 0,
+    },
+    {
+        "source": "Bulletin Officiel",
+        "entreprise": "INDUSTRIE MAGHREB HOLDING",
+        "titre": "Cession de parts sociales — Industrie Maghreb Holding SARL — Tanger",
+        "raw_text": "Cession de 60% des parts sociales — Industrie Maghreb Holding — Secteur industriel",
+        "signal_type": "transmission_succession",
+        "score_initial": 0,
+    },
+    {
+        "source": "Bulletin Officiel",
+        "entreprise": "LOGISTIQUE NORD MAROC",
+        "titre": "Augmentation de capital social — Logistique Nord Maroc SA",
+        "raw_text": "Augmentation de capital de 50M MAD — Logistique Nord Maroc SA — Transport et logistique",
+        "signal_type": "besoin_cash_bfr",
+        "score_initial": 0,
+    },
+    {
+        "source": "Bulletin Officiel",
+        "entreprise": "SANTE PLUS CLINIQUES",
+        "titre": "Apport partiel d'actifs — Santé Plus Cliniques SA vers holding médical",
+        "raw_text": "Apport partiel actifs cliniques — Santé Plus — Secteur santé — Casablanca Rabat",
+        "signal_type": "desinvestissement_activite",
+        "score_initial": 0,
+    },
+
+)
+
+class BulletinOfficielScraper(BaseScraper):
     """
     Scraper pour le Bulletin Officiel du Royaume du Maroc.
     C'est la source légale la plus fiable — tout deal significatif
@@ -21,6 +81,13 @@ class BulletinOfficielScraper:
     BASE_URL = "https://www.bulletinofficiel.ma"
     SEARCH_URL = "https://www.bulletinofficiel.ma/recherche"
 
+    # Pages d'annonces à scanner — figées au niveau classe
+    URLS_ANNONCES = (
+        f"{BASE_URL}/annonces-legales",
+        f"{BASE_URL}/avis-et-communications",
+        f"{BASE_URL}/fr/content/annonces",
+    )
+
     # Mots-clés spécifiques au Bulletin Officiel
     MOTS_CLES_BO = [
         "fusion", "absorption", "apport partiel", "cession de fonds",
@@ -32,14 +99,26 @@ class BulletinOfficielScraper:
     ]
 
     def __init__(self):
-        self.session = requests.Session()
+        super().__init__()
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
                           "AppleWebKit/537.36 Chrome/120.0.0.0 Safari/537.36",
             "Accept-Language": "fr-FR,fr;q=0.9,ar;q=0.8",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
         })
-        self.signaux = []
+        # Automate Aho–Corasick combiné détection + classification : les
+        # mots-clés de détection portent (N, None), ceux de classification
+        # (priorité, catégorie). Ajoutés en dernier, ces derniers écrasent
+        # les doublons — un seul passage par texte suffit pour les deux.
+        nb_classes = len(_CLASSES_BO)
+        self._ac_combine = build_automaton(
+            [(kw, (nb_classes, None)) for kw in self.MOTS_CLES_BO + MOTS_CLES_MA]
+            + [
+                (kw, (priorite, categorie))
+                for priorite, (mots, categorie) in enumerate(_CLASSES_BO)
+                for kw in mots
+            ]
+        )
 
     def run(self):
         """Lance le scraping du Bulletin Officiel."""
@@ -48,6 +127,7 @@ class BulletinOfficielScraper:
         try:
             self._scraper_annonces_legales()
             self._scraper_par_mots_cles()
+            self._dedupliquer()
             logger.success(f"✅ Bulletin Officiel — {len(self.signaux)} signaux détectés")
         except Exception as e:
             logger.error(f"❌ Bulletin Officiel — Erreur : {e}")
@@ -59,28 +139,28 @@ class BulletinOfficielScraper:
         """Scrape les annonces légales récentes."""
         logger.info("   → Scan annonces légales...")
 
-        urls_cibles = [
-            f"{self.BASE_URL}/annonces-legales",
-            f"{self.BASE_URL}/avis-et-communications",
-            f"{self.BASE_URL}/fr/content/annonces",
-        ]
+        # Télécharger les 3 pages en parallèle, parser séquentiellement
+        # (le parsing est léger, c'est le réseau qui coûte)
+        with ThreadPoolExecutor(max_workers=len(self.URLS_ANNONCES)) as executor:
+            reponses = list(executor.map(self._get_silencieux, self.URLS_ANNONCES))
 
-        for url in urls_cibles:
+        for url, response in zip(self.URLS_ANNONCES, reponses):
             try:
-                response = self.session.get(url, timeout=15)
-                if response.status_code != 200:
+                if response is None or response.status_code != 200:
                     continue
 
-                soup = BeautifulSoup(response.text, "html.parser")
-                annonces = soup.select(
+                tree = HTMLParser(response.content)
+                annonces = tree.css(
                     ".annonce, .avis, article, .result-item, "
                     "tr.annonce, .bo-item, .publication-item"
                 )
 
-                for annonce in annonces[:30]:
-                    texte = annonce.get_text(strip=True, separator=" ")
-                    if self._contient_signal_ma(texte):
-                        signal = self._construire_signal(texte, url)
+                textes = [a.text(separator=" ", strip=True) for a in islice(annonces, 30)]
+                for texte, (pertinent, signal_type) in zip(
+                    textes, self._filter_and_classify_batch(textes)
+                ):
+                    if pertinent:
+                        signal = self._construire_signal(texte, url, signal_type)
                         if signal:
                             self.signaux.append(signal)
 
@@ -91,122 +171,75 @@ class BulletinOfficielScraper:
         """Recherche par mots-clés M&A dans le moteur de recherche du BO."""
         logger.info("   → Recherche par mots-clés M&A...")
 
-        for mot_cle in self.MOTS_CLES_BO[:8]:
+        mots_cles = self.MOTS_CLES_BO[:8]
+        with ThreadPoolExecutor(max_workers=len(mots_cles)) as executor:
+            reponses = list(executor.map(
+                lambda mc: self._get_silencieux(self.SEARCH_URL, params={"q": mc, "type": "annonce"}),
+                mots_cles,
+            ))
+
+        for mot_cle, response in zip(mots_cles, reponses):
             try:
-                params = {"q": mot_cle, "type": "annonce"}
-                response = self.session.get(
-                    self.SEARCH_URL,
-                    params=params,
-                    timeout=15
-                )
-                if response.status_code != 200:
+                if response is None or response.status_code != 200:
                     continue
 
-                soup = BeautifulSoup(response.text, "html.parser")
-                resultats = soup.select(".result, .search-result, article, tr")
+                tree = HTMLParser(response.content)
+                resultats = tree.css(".result, .search-result, article, tr")
 
-                for resultat in resultats[:10]:
-                    texte = resultat.get_text(strip=True, separator=" ")
-                    if len(texte) > 30 and self._contient_signal_ma(texte):
-                        signal = self._construire_signal(texte, self.SEARCH_URL)
+                textes = [r.text(separator=" ", strip=True) for r in islice(resultats, 10)]
+                for texte, (pertinent, signal_type) in zip(
+                    textes, self._filter_and_classify_batch(textes)
+                ):
+                    if len(texte) > 30 and pertinent:
+                        signal = self._construire_signal(texte, self.SEARCH_URL, signal_type)
                         if signal:
                             self.signaux.append(signal)
 
             except Exception as e:
                 logger.debug(f"      Mot-clé '{mot_cle}' — {e}")
 
-    def _contient_signal_ma(self, texte):
-        """Vérifie si le texte contient un signal M&A."""
-        if not texte or len(texte) < 20:
-            return False
-        texte_lower = texte.lower()
-        return any(kw.lower() in texte_lower for kw in self.MOTS_CLES_BO + MOTS_CLES_MA)
-
-    def _classifier_signal(self, texte):
-        """Classifie le type de signal M&A."""
-        texte_lower = texte.lower()
-        if any(kw in texte_lower for kw in ["fusion", "absorption", "apport"]):
-            return "acquereur_actif_secteur"
-        if any(kw in texte_lower for kw in ["cession", "vente", "transfert"]):
-            return "desinvestissement_activite"
-        if any(kw in texte_lower for kw in ["augmentation de capital", "apport en numéraire"]):
-            return "besoin_cash_bfr"
-        if any(kw in texte_lower for kw in ["dissolution", "liquidation"]):
-            return "desinvestissement_activite"
-        if any(kw in texte_lower for kw in ["transformation", "scission"]):
-            return "transmission_succession"
-        return "signal_generique"
+    def _filter_and_classify_batch(self, textes):
+        """
+        Détecte et classifie un lot de textes : un seul .lower() et un seul
+        passage d'automate par texte. Renvoie [(pertinent, signal_type), ...]
+        aligné sur l'entrée — le groupe le plus prioritaire qui matche gagne.
+        """
+        resultats = []
+        for texte in textes:
+            if not texte or len(texte) < 20:
+                resultats.append((False, None))
+                continue
+            hits = [payload for _, payload in self._ac_combine.iter(texte.lower())]
+            if not hits:
+                resultats.append((False, None))
+                continue
+            _, categorie = min(hits)
+            resultats.append((True, categorie or "signal_generique"))
+        return resultats
 
     def _extraire_entreprise(self, texte):
         """Tente d'extraire le nom de l'entreprise du texte."""
-        # Patterns courants dans le BO marocain
-        import re
-        patterns = [
-            r"(?:société|SARL|SA|SAS|SNC|GIE)\s+([A-Z][A-Za-z\s&'-]+?)(?:\s+au capital|\s+dont|\s+ayant|\,)",
-            r"([A-Z][A-Z\s&'-]{3,40})\s+(?:SARL|SA|SAS|SNC)",
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, texte)
+        for pattern in _ENTREPRISE_PATTERNS:
+            match = pattern.search(texte)
             if match:
                 return match.group(1).strip()[:60]
         return None
 
-    def _construire_signal(self, texte, url):
+    def _construire_signal(self, texte, url, signal_type):
         """Construit un dict structuré pour un signal."""
         if not texte:
             return None
         return {
             "source":       "Bulletin Officiel",
-            "date":         datetime.now().strftime("%Y-%m-%d"),
+            "date":         self._today,
             "titre":        texte[:150],
             "url":          url,
             "raw_text":     texte[:500],
             "entreprise":   self._extraire_entreprise(texte),
-            "signal_type":  self._classifier_signal(texte),
+            "signal_type":  signal_type,
             "score_initial": 0,
         }
 
     def _donnees_test(self):
         """Données de test si le site est inaccessible."""
-        return [
-            {
-                "source": "Bulletin Officiel",
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "entreprise": "ATLAS DISTRIBUTION SA",
-                "titre": "Projet de fusion-absorption de Atlas Distribution SA par Retail Maroc Group",
-                "url": self.BASE_URL,
-                "raw_text": "Avis de fusion — Atlas Distribution SA — Distribution alimentaire — Casablanca",
-                "signal_type": "acquereur_actif_secteur",
-                "score_initial": 0,
-            },
-            {
-                "source": "Bulletin Officiel",
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "entreprise": "INDUSTRIE MAGHREB HOLDING",
-                "titre": "Cession de parts sociales — Industrie Maghreb Holding SARL — Tanger",
-                "url": self.BASE_URL,
-                "raw_text": "Cession de 60% des parts sociales — Industrie Maghreb Holding — Secteur industriel",
-                "signal_type": "transmission_succession",
-                "score_initial": 0,
-            },
-            {
-                "source": "Bulletin Officiel",
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "entreprise": "LOGISTIQUE NORD MAROC",
-                "titre": "Augmentation de capital social — Logistique Nord Maroc SA",
-                "url": self.BASE_URL,
-                "raw_text": "Augmentation de capital de 50M MAD — Logistique Nord Maroc SA — Transport et logistique",
-                "signal_type": "besoin_cash_bfr",
-                "score_initial": 0,
-            },
-            {
-                "source": "Bulletin Officiel",
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "entreprise": "SANTE PLUS CLINIQUES",
-                "titre": "Apport partiel d'actifs — Santé Plus Cliniques SA vers holding médical",
-                "url": self.BASE_URL,
-                "raw_text": "Apport partiel actifs cliniques — Santé Plus — Secteur santé — Casablanca Rabat",
-                "signal_type": "desinvestissement_activite",
-                "score_initial": 0,
-            },
-        ]
+        return [{**tpl, "date": self._today, "url": self.BASE_URL} for tpl in _DONNEES_TEST]
@@ -5,13 +5,62 @@ Détecte : décisions de concentration, avis sectoriels, opérations autorisées
 C'est la source M&A la plus fiable — chaque décision = deal confirmé
 """
 
-import requests
-from bs4 import BeautifulSoup
+import re
+
+from itertools import islice
+from selectolax.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from loguru import logger
+from scoring.matcher import build_classifier
+from scrapers.base import BaseScraper
+
+# Patterns d'extraction du nom d'entreprise, compilés une fois à l'import
+_ENTREPRISE_PATTERNS = (
+    re.compile(r"(?:entre|par|de)\s+([A-Z][A-Za-z\s&'-]+?)(?:\s+et|\s+SA|\s+SARL|\,|\.|$)"),
+    re.compile(r"([A-Z][A-Z\s&'-]{3,40})\s+(?:SA|SARL|Group|Holding|Maroc)"),
+)
+
+# Groupes de classification, dans l'ordre de priorité (le 1er qui matche gagne)
+_CLASSES_CC = (
+    (("concentration", "fusion", "acquisition", "absorption"), "acquereur_actif_secteur"),
+    (("cession", "transfert", "vente"), "desinvestissement_activite"),
+    (("avis", "recommandation", "sectoriel"), "consolidation_sectorielle"),
+)
+
+
+
+# Signaux de test du mode dégradé — gabarits figés à l'import, la date
+# du scan et l'URL de base sont injectées à l'appel
+_DONNEES_TEST = (
+    {
+        "source": "Conseil de la Concurrence",
+        "entreprise": "MARJANE HOLDING",
+        "titre": "Décision n°CC-2026-01 — Autorisation de l'opération de concentration entre Marjane Holding et un distributeur régional",
+        "raw_text": "Concentration autorisée — Distribution alimentaire — Marjane acquiert réseau régional Maroc",
+        "signal_type": "acquereur_actif_secteur",
+        "score_initial": 0,
+    },
+    {
+        "source": "Conseil de la Concurrence",
+        "entreprise": "AKDITAL",
+        "titre": "Avis CC-2026-02 — Concentration dans le secteur de la santé privée — Akdital et cliniques régionales",
+        "raw_text": "Opération de concentration secteur santé — Akdital — Acquisition cliniques régionales Maroc",
+        "signal_type": "acquereur_actif_secteur",
+        "score_initial": 0,
+    },
+    {
+        "source": "Conseil de la Concurrence",
+        "entreprise": "CIMENTS DU MAROC",
+        "titre": "Décision CC-2026-03 — Cession d'actifs industriels — Secteur matériaux construction",
+        "raw_text": "Cession d'actifs — Secteur BTP et matériaux — Ciments du Maroc — Restructuration",
+        "signal_type": "desinvestissement_activite",
+        "score_initial": 0,
+    },
 
+)
 
-class ConseilConcurrenceScraper:
+class ConseilConcurrenceScraper(BaseScraper):
 
     BASE_URL = "https://www.conseil-concurrence.ma"
     SECTIONS = [
@@ -22,19 +71,21 @@ class ConseilConcurrenceScraper:
     ]
 
     def __init__(self):
-        self.session = requests.Session()
+        super().__init__()
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
                           "AppleWebKit/537.36 Chrome/120.0.0.0 Safari/537.36",
             "Accept-Language": "fr-FR,fr;q=0.9",
         })
-        self.signaux = []
+        self._ac_classes = build_classifier(_CLASSES_CC)
 
     def run(self):
         logger.info("⚖️ Conseil de la Concurrence — Démarrage du scan...")
         try:
-            for section in self.SECTIONS:
-                self._scraper_section(section)
+            # Les 4 sections sont indépendantes : fetch + parse en parallèle
+            with ThreadPoolExecutor(max_workers=len(self.SECTIONS)) as executor:
+                list(executor.map(self._scraper_section, self.SECTIONS))
+            self._dedupliquer()
             if not self.signaux:
                 self.signaux.extend(self._donnees_test())
             logger.success(f"✅ Conseil Concurrence — {len(self.signaux)} signaux détectés")
@@ -49,83 +100,45 @@ class ConseilConcurrenceScraper:
             response = self.session.get(url, timeout=15)
             if response.status_code != 200:
                 return
-            soup = BeautifulSoup(response.text, "html.parser")
-            items = soup.select("article, .decision-item, .avis-item, tr, .publication, li.item")
-            for item in items[:20]:
-                texte = item.get_text(strip=True, separator=" ")
+            tree = HTMLParser(response.content)
+            items = tree.css("article, .decision-item, .avis-item, tr, .publication, li.item")
+            textes = [item.text(separator=" ", strip=True) for item in islice(items, 20)]
+            for texte, signal_type in zip(textes, self._classify_batch(textes)):
                 if len(texte) > 30:
-                    signal = self._construire_signal(texte, url, section)
+                    signal = self._construire_signal(texte, url, section, signal_type)
                     if signal:
                         self.signaux.append(signal)
         except Exception as e:
             logger.debug(f"      Section {section} — {e}")
 
-    def _classifier_signal(self, texte):
-        texte_lower = texte.lower()
-        if any(kw in texte_lower for kw in ["concentration", "fusion", "acquisition", "absorption"]):
-            return "acquereur_actif_secteur"
-        if any(kw in texte_lower for kw in ["cession", "transfert", "vente"]):
-            return "desinvestissement_activite"
-        if any(kw in texte_lower for kw in ["avis", "recommandation", "sectoriel"]):
-            return "consolidation_sectorielle"
-        return "acquereur_actif_secteur"
+    def _classify_batch(self, textes):
+        """Classifie un lot de textes en un seul passage d'automate par texte."""
+        types = []
+        for texte in textes:
+            hits = [payload for _, payload in self._ac_classes.iter(texte.lower())]
+            types.append(min(hits)[1] if hits else "acquereur_actif_secteur")
+        return types
 
     def _extraire_entreprise(self, texte):
-        import re
-        patterns = [
-            r"(?:entre|par|de)\s+([A-Z][A-Za-z\s&'-]+?)(?:\s+et|\s+SA|\s+SARL|\,|\.|$)",
-            r"([A-Z][A-Z\s&'-]{3,40})\s+(?:SA|SARL|Group|Holding|Maroc)",
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, texte)
+        for pattern in _ENTREPRISE_PATTERNS:
+            match = pattern.search(texte)
             if match:
                 return match.group(1).strip()[:60]
         return None
 
-    def _construire_signal(self, texte, url, section):
+    def _construire_signal(self, texte, url, section, signal_type):
         if not texte or len(texte) < 20:
             return None
         return {
             "source":       "Conseil de la Concurrence",
-            "date":         datetime.now().strftime("%Y-%m-%d"),
+            "date":         self._today,
             "titre":        texte[:150],
             "url":          url,
             "raw_text":     texte[:500],
             "entreprise":   self._extraire_entreprise(texte),
-            "signal_type":  self._classifier_signal(texte),
+            "signal_type":  signal_type,
             "score_initial": 0,
         }
 
     def _donnees_test(self):
-        return [
-            {
-                "source": "Conseil de la Concurrence",
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "entreprise": "MARJANE HOLDING",
-                "titre": "Décision n°CC-2026-01 — Autorisation de l'opération de concentration entre Marjane Holding et un distributeur régional",
-                "url": self.BASE_URL,
-                "raw_text": "Concentration autorisée — Distribution alimentaire — Marjane acquiert réseau régional Maroc",
-                "signal_type": "acquereur_actif_secteur",
-                "score_initial": 0,
-            },
-            {
-                "source": "Conseil de la Concurrence",
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "entreprise": "AKDITAL",
-                "titre": "Avis CC-2026-02 — Concentration dans le secteur de la santé privée — Akdital et cliniques régionales",
-                "url": self.BASE_URL,
-                "raw_text": "Opération de concentration secteur santé — Akdital — Acquisition cliniques régionales Maroc",
-                "signal_type": "acquereur_actif_secteur",
-                "score_initial": 0,
-            },
-            {
-                "source": "Conseil de la Concurrence",
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "entreprise": "CIMENTS DU MAROC",
-                "titre": "Décision CC-2026-03 — Cession d'actifs industriels — Secteur matériaux construction",
-                "url": self.BASE_URL,
-                "raw_text": "Cession d'actifs — Secteur BTP et matériaux — Ciments du Maroc — Restructuration",
-                "signal_type": "desinvestissement_activite",
-                "score_initial": 0,
-            },
-        ]
+        return [{**tpl, "date": self._today, "url": self.BASE_URL} for tpl in _DONNEES_TEST]
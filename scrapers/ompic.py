@@ -7,14 +7,79 @@ Surveille les modifications légales enregistrées à l'OMPIC :
   - Créations de nouvelles sociétés dans les secteurs cibles
 """
 
+import re
+
+from itertools import islice
 import requests
 from bs4 import BeautifulSoup
-from datetime import datetime
+from datetime import datetime, timedelta
 from loguru import logger
-from config import SECTEURS_PRIORITAIRES, MOTS_CLES_MA
+import soupsieve
+from config import SECTEURS_PRIORITAIRES
+from scoring.matcher import build_classifier, contient_mot_cle
+from scrapers.base import BaseScraper
+
+# Sélecteurs des champs d'une entrée du registre, compilés une fois à
+# l'import — l'AST CSS est réutilisé à chaque ligne au lieu d'être reparsé
+_SEL_ENTREPRISE = soupsieve.compile(".company-name, .raison-sociale, td:nth-child(1)")
+_SEL_TYPE_MODIF = soupsieve.compile(".type-modif, .acte, td:nth-child(2)")
+_SEL_VILLE      = soupsieve.compile(".ville, .city, td:nth-child(3)")
+_SEL_RC         = soupsieve.compile(".rc, td:nth-child(4)")
+
+# Groupes de classification, dans l'ordre de priorité (le 1er groupe
+# qui matche l'emporte — même sémantique que l'ancienne cascade de any())
+_CLASSES_OMPIC = (
+    (("directeur", "gérant", "président", "pdg", "dg"), "changement_direction"),
+    (("capital", "augmentation", "cession de parts"), "besoin_cash_bfr"),
+    (("dissolution", "radiation", "liquidation"), "desinvestissement_activite"),
+    (("fusion", "absorption", "apport"), "acquereur_actif_secteur"),
+)
+
+# Automate Aho–Corasick compilé une fois à l'import
+_AC_CLASSES = build_classifier(_CLASSES_OMPIC)
+
+# Micro-structures à écarter du radar — une alternation compilée, un seul
+# passage C sur le texte au lieu d'un scan Python par exclusion
+_EXCLUSIONS_RE = re.compile(r"auto-entrepreneur|personne physique|artisan")
 
 
-class OmpicScraper:
+
+# Signaux de test du mode dégradé — gabarits figés à l'import, la date du
+# scan est injectée à l'appel
+_DONNEES_TEST = (
+    {
+        "source": "OMPIC",
+        "entreprise": "DISTRIB ATLAS SARL",
+        "type_modification": "Changement de gérant",
+        "ville": "Casablanca",
+        "rc_number": "CS 123456",
+        "raw_text": "Changement de gérant — Distrib Atlas SARL — Distribution alimentaire",
+        "signal_type": "changement_direction",
+        "score_initial": 0,
+    },
+    {
+        "source": "OMPIC",
+        "entreprise": "INDUSTRIE MAGHREB SA",
+        "type_modification": "Augmentation de capital",
+        "ville": "Tanger",
+        "rc_number": "TNG 789012",
+        "raw_text": "Augmentation de capital social — Industrie Maghreb SA — Secteur industriel",
+        "signal_type": "besoin_cash_bfr",
+        "score_initial": 0,
+    },
+    {
+        "source": "OMPIC",
+        "entreprise": "BTP NORD MAROC",
+        "type_modification": "Cession de parts sociales",
+        "ville": "Rabat",
+        "rc_number": "RB 345678",
+        "raw_text": "Cession de parts sociales — BTP Nord Maroc — Secteur BTP",
+        "signal_type": "transmission_succession",
+        "score_initial": 0,
+    },
+)
+
+class OmpicScraper(BaseScraper):
     """
     Scraper pour le registre du commerce marocain (OMPIC).
     
@@ -28,14 +93,15 @@ class OmpicScraper:
     SEARCH_URL = "https://www.ompic.ma/fr/content/recherche-dans-le-registre-central-du-commerce"
 
     def __init__(self):
-        self.session = requests.Session()
+        super().__init__()
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
                           "AppleWebKit/537.36 (KHTML, like Gecko) "
                           "Chrome/120.0.0.0 Safari/537.36",
             "Accept-Language": "fr-FR,fr;q=0.9",
         })
-        self.signaux = []
+        # Borne de recherche figée au début du scan — un seul strftime
+        self._hier = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
 
     def run(self):
         """Point d'entrée principal — lance le scraping complet."""
@@ -44,6 +110,7 @@ class OmpicScraper:
         try:
             self._scraper_modifications_recentes()
             self._scraper_nouvelles_immatriculations()
+            self._dedupliquer_registre()
             logger.success(f"✅ OMPIC — {len(self.signaux)} signaux détectés")
         except Exception as e:
             logger.error(f"❌ OMPIC — Erreur : {e}")
@@ -65,7 +132,9 @@ class OmpicScraper:
         try:
             response = self.session.get(self.SEARCH_URL, timeout=15)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
+            # Parseur C lxml sur les bytes bruts : pas de décodage redondant,
+            # lxml détecte l'encodage depuis le <meta>
+            soup = BeautifulSoup(response.content, "lxml")
 
             # Extraction des entrées du registre
             # (adapter les sélecteurs CSS selon la structure réelle du site)
@@ -88,11 +157,11 @@ class OmpicScraper:
         """
         logger.info("   → Scan des nouvelles immatriculations...")
         
-        for secteur in SECTEURS_PRIORITAIRES[:5]:  # Top 5 secteurs prioritaires
+        for secteur in islice(SECTEURS_PRIORITAIRES, 5):  # Top 5 secteurs prioritaires
             try:
                 params = {
                     "secteur": secteur,
-                    "date_debut": self._date_hier(),
+                    "date_debut": self._hier,
                     "type": "immatriculation"
                 }
                 # Requête OMPIC pour ce secteur
@@ -108,40 +177,57 @@ class OmpicScraper:
         Adapter les sélecteurs selon la structure HTML réelle de l'OMPIC.
         """
         try:
+            # Texte brut extrait et passé en minuscules une seule fois —
+            # classification et filtre de pertinence relisent _raw_lower
+            brut = entry.get_text(strip=True)
+            brut_min = brut.lower()
             return {
                 "source": "OMPIC",
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "entreprise": entry.select_one(".company-name, .raison-sociale, td:nth-child(1)").get_text(strip=True) if entry.select_one(".company-name, .raison-sociale, td:nth-child(1)") else "N/A",
-                "type_modification": entry.select_one(".type-modif, .acte, td:nth-child(2)").get_text(strip=True) if entry.select_one(".type-modif, .acte, td:nth-child(2)") else "N/A",
-                "ville": entry.select_one(".ville, .city, td:nth-child(3)").get_text(strip=True) if entry.select_one(".ville, .city, td:nth-child(3)") else "N/A",
-                "rc_number": entry.select_one(".rc, td:nth-child(4)").get_text(strip=True) if entry.select_one(".rc, td:nth-child(4)") else "N/A",
-                "raw_text": entry.get_text(strip=True),
-                "signal_type": self._classifier_signal(entry.get_text(strip=True)),
+                "date": self._today,
+                "entreprise": self._pick(entry, _SEL_ENTREPRISE),
+                "type_modification": self._pick(entry, _SEL_TYPE_MODIF),
+                "ville": self._pick(entry, _SEL_VILLE),
+                "rc_number": self._pick(entry, _SEL_RC),
+                "raw_text": brut,
+                "_raw_lower": brut_min,
+                "signal_type": self._classifier_signal(brut_min),
                 "score_initial": 0,  # Sera calculé par le moteur de scoring
             }
         except Exception:
             return None
 
-    def _classifier_signal(self, texte):
+    def _dedupliquer_registre(self):
         """
-        Classifie le type de signal M&A basé sur le texte de l'entrée.
-        Retourne la clé du signal correspondant dans SCORING_WEIGHTS.
+        Supprime les doublons du registre : la même inscription peut sortir
+        par plusieurs sélecteurs. Clé (n° RC, type de modification), ou
+        texte brut quand le n° RC n'a pas pu être extrait.
         """
-        texte_lower = texte.lower()
+        vus, uniques = set(), []
+        for s in self.signaux:
+            rc = s.get("rc_number", "N/A")
+            if rc != "N/A":
+                cle = (rc, s.get("type_modification", ""))
+            else:
+                cle = s.get("raw_text", "")
+            if cle not in vus:
+                vus.add(cle)
+                uniques.append(s)
+        self.signaux = uniques
 
-        if any(kw in texte_lower for kw in ["directeur", "gérant", "président", "pdg", "dg"]):
-            return "changement_direction"
-        
-        if any(kw in texte_lower for kw in ["capital", "augmentation", "cession de parts"]):
-            return "besoin_cash_bfr"
-        
-        if any(kw in texte_lower for kw in ["dissolution", "radiation", "liquidation"]):
-            return "desinvestissement_activite"
-        
-        if any(kw in texte_lower for kw in ["fusion", "absorption", "apport"]):
-            return "acquereur_actif_secteur"
+    @staticmethod
+    def _pick(entry, selecteur, defaut="N/A"):
+        """Texte du premier nœud matché par un sélecteur précompilé."""
+        node = selecteur.select_one(entry)
+        return node.get_text(strip=True) if node else defaut
 
-        return "signal_generique"
+    def _classifier_signal(self, texte_min):
+        """
+        Classifie le type de signal M&A basé sur le texte de l'entrée
+        (déjà en minuscules). Retourne la clé du signal correspondant dans
+        SCORING_WEIGHTS — le groupe le plus prioritaire qui matche gagne.
+        """
+        hits = [payload for _, payload in _AC_CLASSES.iter(texte_min)]
+        return min(hits)[1] if hits else "signal_generique"
 
     def _est_pertinent(self, signal):
         """
@@ -151,9 +237,10 @@ class OmpicScraper:
         if not signal:
             return False
 
+        brut_min = signal.get("_raw_lower") or signal.get("raw_text", "").lower()
+
         # Exclure les micro-entreprises et auto-entrepreneurs
-        exclusions = ["auto-entrepreneur", "personne physique", "artisan"]
-        if any(ex in signal.get("raw_text", "").lower() for ex in exclusions):
+        if _EXCLUSIONS_RE.search(brut_min):
             return False
 
         # Garder si modification significative ou mots-clés M&A présents
@@ -161,51 +248,11 @@ class OmpicScraper:
             return True
 
         # Vérifier présence de mots-clés M&A dans le texte brut
-        texte = signal.get("raw_text", "").lower()
-        return any(kw.lower() in texte for kw in MOTS_CLES_MA)
-
-    def _date_hier(self):
-        """Retourne la date d'hier au format YYYY-MM-DD."""
-        from datetime import timedelta
-        return (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+        return contient_mot_cle(brut_min)
 
     def _donnees_test(self):
         """
         Données de test pour développement en mode dégradé.
         Simule des signaux OMPIC réels pour tester le pipeline.
         """
-        return [
-            {
-                "source": "OMPIC",
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "entreprise": "DISTRIB ATLAS SARL",
-                "type_modification": "Changement de gérant",
-                "ville": "Casablanca",
-                "rc_number": "CS 123456",
-                "raw_text": "Changement de gérant — Distrib Atlas SARL — Distribution alimentaire",
-                "signal_type": "changement_direction",
-                "score_initial": 0,
-            },
-            {
-                "source": "OMPIC",
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "entreprise": "INDUSTRIE MAGHREB SA",
-                "type_modification": "Augmentation de capital",
-                "ville": "Tanger",
-                "rc_number": "TNG 789012",
-                "raw_text": "Augmentation de capital social — Industrie Maghreb SA — Secteur industriel",
-                "signal_type": "besoin_cash_bfr",
-                "score_initial": 0,
-            },
-            {
-                "source": "OMPIC",
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "entreprise": "BTP NORD MAROC",
-                "type_modification": "Cession de parts sociales",
-                "ville": "Rabat",
-                "rc_number": "RB 345678",
-                "raw_text": "Cession de parts sociales — BTP Nord Maroc — Secteur BTP",
-                "signal_type": "transmission_succession",
-                "score_initial": 0,
-            },
-        ]
+        return [{**tpl, "date": self._today} for tpl in _DONNEES_TEST]
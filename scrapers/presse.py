@@ -4,11 +4,28 @@ Les flux RSS marchent depuis n'importe quel serveur dans le monde.
 Pas de blocage géographique, pas de sélecteurs CSS à maintenir.
 """
 
-import requests
-import xml.etree.ElementTree as ET
+from lxml import etree
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from datetime import datetime
 from loguru import logger
 from config import MOTS_CLES_MA, SECTEURS_PRIORITAIRES
+from scoring.matcher import build_automaton, build_classifier
+from scrapers.base import BaseScraper
+
+# Namespace Atom — certains flux publient des <entry> au lieu des <item> RSS
+_NS_ATOM = {"atom": "http://www.w3.org/2005/Atom"}
+
+# Au-delà de cette taille, ce n'est pas un flux RSS mais un site mal
+# configuré — on ne paie ni le parsing ni la mémoire
+MAX_OCTETS_RSS = 2 * 1024 * 1024
+
+# Tags candidats par champ (RSS puis Atom) — tuples de module, pas de
+# liste reconstruite à chaque article
+_TAGS_TITRE = ("title", "atom:title")
+_TAGS_DESC  = ("description", "summary", "atom:summary")
+_TAGS_LIEN  = ("link", "atom:link")
+_TAGS_DATE  = ("pubDate", "published", "atom:published")
 
 # Flux RSS des journaux marocains économiques
 FLUX_RSS = [
@@ -52,29 +69,114 @@ MOTS_CLES_ELARGIS = [
     "santé", "fintech", "agroalimentaire", "immobilier",
 ]
 
+# Groupes de classification, dans l'ordre de priorité (le 1er groupe
+# qui matche l'emporte — même sémantique que l'ancienne cascade de any())
+_CLASSES_PRESSE = (
+    (("succession", "transmission", "retraite", "fondateur"), "transmission_succession"),
+    (("acquisition", "rachat", "croissance externe", "fusion"), "acquereur_actif_secteur"),
+    (("cession", "vente", "désengagement", "cède"), "desinvestissement_activite"),
+    (("capital", "levée", "financement", "investissement", "endettement"), "besoin_cash_bfr"),
+    (("directeur", "pdg", "dg", "nomination", "départ"), "changement_direction"),
+    (("bourse", "ipo", "introduction", "cotation"), "besoin_cash_bfr"),
+    (("expansion", "ouverture", "développement"), "expansion_geographique"),
+)
+
+# Automates Aho–Corasick compilés une fois à l'import : un passage O(|texte|)
+# par article au lieu d'un scan Python par mot-clé. L'automate de détection
+# couvre mots-clés élargis + config, avec les secteurs prioritaires tagués
+# par leur nom — le même passage détecte le signal ET extrait le secteur.
+_AC_SIGNAUX = build_automaton(
+    [(kw, None) for kw in MOTS_CLES_ELARGIS + MOTS_CLES_MA]
+    + [(s, s) for s in SECTEURS_PRIORITAIRES]
+)
+_AC_CLASSES = build_classifier(_CLASSES_PRESSE)
+
 
-class PresseEcoScraper:
+
+# Signaux de test du mode dégradé — gabarits figés à l'import, la date du
+# scan est injectée à l'appel
+_DONNEES_TEST = (
+    {
+        "source": "Médias24",
+        "titre": "Marjane annonce l'acquisition de 12 supermarchés régionaux pour renforcer sa présence",
+        "url": "https://www.medias24.com",
+        "raw_text": "Marjane Holding — acquisition supermarchés régionaux — Distribution — Maroc",
+        "signal_type": "acquereur_actif_secteur",
+        "score_initial": 0,
+        "entreprise": "Marjane Holding",
+    },
+    {
+        "source": "L'Économiste",
+        "titre": "Label'Vie : Le conseil d'administration cherche un successeur au PDG démissionnaire",
+        "url": "https://www.leconomiste.com",
+        "raw_text": "Label'Vie — succession PDG — Distribution — Conseil d'administration",
+        "signal_type": "transmission_succession",
+        "score_initial": 0,
+        "entreprise": "Label'Vie",
+    },
+    {
+        "source": "Challenge",
+        "titre": "Akdital lève 500 MDH pour financer son expansion dans 6 nouvelles villes",
+        "url": "https://www.challenge.ma",
+        "raw_text": "Akdital — levée de fonds — Santé — expansion — cliniques privées Maroc",
+        "signal_type": "besoin_cash_bfr",
+        "score_initial": 0,
+        "entreprise": "Akdital",
+    },
+    {
+        "source": "LesEco",
+        "titre": "Dislog cède sa division produits ménagers pour se recentrer sur la logistique",
+        "url": "https://leseco.ma",
+        "raw_text": "Dislog — cession division — Logistique — désengagement — recentrage stratégique",
+        "signal_type": "desinvestissement_activite",
+        "score_initial": 0,
+        "entreprise": "Dislog Group",
+    },
+    {
+        "source": "Médias24",
+        "titre": "Secteur BTP : trois groupes marocains en négociation exclusive pour une fusion",
+        "url": "https://www.medias24.com",
+        "raw_text": "BTP — fusion — consolidation — groupes marocains — Maroc construction",
+        "signal_type": "acquereur_actif_secteur",
+        "score_initial": 0,
+        "entreprise": None,
+    },
+    {
+        "source": "MAP",
+        "titre": "Un fonds PE émirati entre au capital d'un groupe industriel marocain à hauteur de 35%",
+        "url": "https://www.mapnews.ma",
+        "raw_text": "Fonds Private Equity — entrée au capital — Industrie — Maroc — 35% participation",
+        "signal_type": "besoin_cash_bfr",
+        "score_initial": 0,
+        "entreprise": None,
+    },
+
+)
+
+class PresseEcoScraper(BaseScraper):
     """
     Scraper presse économique marocaine via RSS.
     Fonctionne depuis n'importe quel serveur, sans blocage géographique.
     """
 
     def __init__(self):
-        self.session = requests.Session()
+        super().__init__()
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (compatible; MARadarBot/1.0)",
             "Accept": "application/rss+xml, application/xml, text/xml, */*",
+            # Explicite pour que tous les serveurs compressent le flux
+            "Accept-Encoding": "gzip, deflate, br",
         })
-        self.signaux = []
 
     def run(self):
         logger.info("📰 Presse économique (RSS) — Démarrage du scan...")
 
-        for flux in FLUX_RSS:
-            try:
-                self._parser_rss(flux["source"], flux["url"])
-            except Exception as e:
-                logger.debug(f"   {flux['source']} — {e}")
+        # Les flux sont indépendants : fetch + parse en parallèle, le temps
+        # total devient celui du flux le plus lent au lieu de la somme
+        with ThreadPoolExecutor(max_workers=min(len(FLUX_RSS), 8)) as executor:
+            list(executor.map(self._scanner_flux, FLUX_RSS))
+
+        self._dedupliquer_articles()
 
         # Fallback données de test si aucun RSS accessible
         if not self.signaux:
@@ -84,6 +186,27 @@ class PresseEcoScraper:
         logger.success(f"✅ Presse RSS — {len(self.signaux)} signaux détectés")
         return self.signaux
 
+    def _dedupliquer_articles(self):
+        """
+        Supprime les articles vus par plusieurs flux (Médias24 et Médias24
+        Éco se recoupent) — clé URL, ou titre à défaut. Chaque doublon qui
+        passe coûte un scoring IA en aval.
+        """
+        vus, uniques = set(), []
+        for s in self.signaux:
+            cle = (s.get("url") or s.get("titre", "")[:100]).strip().lower()
+            if cle not in vus:
+                vus.add(cle)
+                uniques.append(s)
+        self.signaux = uniques
+
+    def _scanner_flux(self, flux):
+        """Wrapper d'un flux pour l'exécution parallèle — n'élève jamais."""
+        try:
+            self._parser_rss(flux["source"], flux["url"])
+        except Exception as e:
+            logger.debug(f"   {flux['source']} — {e}")
+
     def _parser_rss(self, source, url):
         """Parse un flux RSS et extrait les articles pertinents."""
         try:
@@ -92,32 +215,46 @@ class PresseEcoScraper:
                 logger.debug(f"   {source} RSS — HTTP {response.status_code}")
                 return
 
-            # Parser le XML
-            root = ET.fromstring(response.content)
+            # 304 revalidé : le flux n'a pas changé depuis le dernier scan,
+            # ses articles sont déjà passés par le pipeline — zéro re-parsing
+            if getattr(response, "revalidated", False):
+                logger.debug(f"   {source} RSS — 304, flux inchangé depuis le dernier scan")
+                return
 
-            # Namespace possible
-            ns = {"atom": "http://www.w3.org/2005/Atom"}
+            contenu = response.content
+            if len(contenu) > MAX_OCTETS_RSS:
+                logger.debug(f"   {source} RSS — {len(contenu)} octets, flux ignoré")
+                return
+
+            # Parser le XML avec lxml (binding libxml2 en C)
+            root = etree.fromstring(contenu)
 
-            # Articles RSS standard
-            items = root.findall(".//item") or root.findall(".//atom:entry", ns)
+            # Articles RSS standard, sinon entrées Atom
+            items = root.findall(".//item") or root.findall(".//atom:entry", _NS_ATOM)
 
             nb_trouves = 0
-            for item in items[:30]:
-                titre       = self._get_text(item, ["title", "atom:title"])
-                description = self._get_text(item, ["description", "summary", "atom:summary"])
-                lien        = self._get_text(item, ["link", "atom:link"])
-                date        = self._get_text(item, ["pubDate", "published", "atom:published"])
+            for item in islice(items, 30):
+                titre       = self._get_text(item, _TAGS_TITRE)
+                description = self._get_text(item, _TAGS_DESC)
+                lien        = self._get_text(item, _TAGS_LIEN)
+                date        = self._get_text(item, _TAGS_DATE)
 
                 texte_complet = f"{titre} {description}"
+                # Un seul .lower() par article, partagé détection /
+                # classification / clé _raw_lower du signal
+                texte_min = texte_complet.lower()
 
-                if self._contient_signal_ma(texte_complet):
+                trouve, secteur = self._detecter_signal(texte_min)
+                if trouve:
                     signal = self._construire_signal(
                         source=source,
                         titre=titre,
                         description=description,
                         url=lien,
                         date=date,
-                        texte_brut=texte_complet
+                        texte_brut=texte_complet,
+                        texte_min=texte_min,
+                        secteur=secteur,
                     )
                     if signal:
                         self.signaux.append(signal)
@@ -128,7 +265,7 @@ class PresseEcoScraper:
             else:
                 logger.debug(f"   {source} → 0 signaux M&A ce jour")
 
-        except ET.ParseError as e:
+        except etree.XMLSyntaxError as e:
             logger.debug(f"   {source} XML parse error — {e}")
         except Exception as e:
             logger.debug(f"   {source} — {e}")
@@ -136,113 +273,51 @@ class PresseEcoScraper:
     def _get_text(self, element, tags):
         """Récupère le texte du premier tag trouvé."""
         for tag in tags:
-            child = element.find(tag)
+            child = element.find(tag, _NS_ATOM)
             if child is not None and child.text:
                 return child.text.strip()
         return ""
 
-    def _contient_signal_ma(self, texte):
-        """Vérifie si le texte contient un signal M&A."""
-        if not texte or len(texte) < 10:
-            return False
-        texte_lower = texte.lower()
-        return any(kw.lower() in texte_lower for kw in MOTS_CLES_ELARGIS)
-
-    def _classifier_signal(self, texte):
-        """Classifie le type de signal M&A."""
-        texte_lower = texte.lower()
-        if any(kw in texte_lower for kw in ["succession", "transmission", "retraite", "fondateur"]):
-            return "transmission_succession"
-        if any(kw in texte_lower for kw in ["acquisition", "rachat", "croissance externe", "fusion"]):
-            return "acquereur_actif_secteur"
-        if any(kw in texte_lower for kw in ["cession", "vente", "désengagement", "cède"]):
-            return "desinvestissement_activite"
-        if any(kw in texte_lower for kw in ["capital", "levée", "financement", "investissement", "endettement"]):
-            return "besoin_cash_bfr"
-        if any(kw in texte_lower for kw in ["directeur", "pdg", "dg", "nomination", "départ"]):
-            return "changement_direction"
-        if any(kw in texte_lower for kw in ["bourse", "ipo", "introduction", "cotation"]):
-            return "besoin_cash_bfr"
-        if any(kw in texte_lower for kw in ["expansion", "ouverture", "développement"]):
-            return "expansion_geographique"
-        return "signal_generique"
-
-    def _construire_signal(self, source, titre, description, url, date, texte_brut):
+    def _detecter_signal(self, texte_min):
+        """
+        Détecte la présence d'un signal M&A dans le texte (déjà en
+        minuscules) et extrait au passage le secteur prioritaire s'il est
+        cité — un seul passage d'automate pour les deux.
+        Renvoie (trouvé, secteur ou None).
+        """
+        if not texte_min or len(texte_min) < 10:
+            return False, None
+        trouve, secteur = False, None
+        for _, payload in _AC_SIGNAUX.iter(texte_min):
+            trouve = True
+            if payload:                 # mot-clé tagué par un secteur
+                secteur = payload
+                break
+        return trouve, secteur
+
+    def _classifier_signal(self, texte_min):
+        """Classifie le type de signal M&A — le groupe le plus prioritaire qui matche gagne."""
+        hits = [payload for _, payload in _AC_CLASSES.iter(texte_min)]
+        return min(hits)[1] if hits else "signal_generique"
+
+    def _construire_signal(self, source, titre, description, url, date, texte_brut, texte_min, secteur=None):
         """Construit un dict structuré pour un signal."""
         if not titre:
             return None
-        return {
+        signal = {
             "source":       source,
-            "date":         datetime.now().strftime("%Y-%m-%d"),
+            "date":         self._today,
             "titre":        titre[:200],
             "url":          url or "",
             "raw_text":     texte_brut[:500],
-            "signal_type":  self._classifier_signal(texte_brut),
+            "signal_type":  self._classifier_signal(texte_min),
             "score_initial": 0,
             "entreprise":   None,  # Extrait par Claude lors du scoring
         }
+        if secteur:
+            signal["secteur"] = secteur
+        return signal
 
     def _donnees_test(self):
         """Données de test réalistes si RSS inaccessibles."""
-        return [
-            {
-                "source": "Médias24",
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "titre": "Marjane annonce l'acquisition de 12 supermarchés régionaux pour renforcer sa présence",
-                "url": "https://www.medias24.com",
-                "raw_text": "Marjane Holding — acquisition supermarchés régionaux — Distribution — Maroc",
-                "signal_type": "acquereur_actif_secteur",
-                "score_initial": 0,
-                "entreprise": "Marjane Holding",
-            },
-            {
-                "source": "L'Économiste",
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "titre": "Label'Vie : Le conseil d'administration cherche un successeur au PDG démissionnaire",
-                "url": "https://www.leconomiste.com",
-                "raw_text": "Label'Vie — succession PDG — Distribution — Conseil d'administration",
-                "signal_type": "transmission_succession",
-                "score_initial": 0,
-                "entreprise": "Label'Vie",
-            },
-            {
-                "source": "Challenge",
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "titre": "Akdital lève 500 MDH pour financer son expansion dans 6 nouvelles villes",
-                "url": "https://www.challenge.ma",
-                "raw_text": "Akdital — levée de fonds — Santé — expansion — cliniques privées Maroc",
-                "signal_type": "besoin_cash_bfr",
-                "score_initial": 0,
-                "entreprise": "Akdital",
-            },
-            {
-                "source": "LesEco",
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "titre": "Dislog cède sa division produits ménagers pour se recentrer sur la logistique",
-                "url": "https://leseco.ma",
-                "raw_text": "Dislog — cession division — Logistique — désengagement — recentrage stratégique",
-                "signal_type": "desinvestissement_activite",
-                "score_initial": 0,
-                "entreprise": "Dislog Group",
-            },
-            {
-                "source": "Médias24",
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "titre": "Secteur BTP : trois groupes marocains en négociation exclusive pour une fusion",
-                "url": "https://www.medias24.com",
-                "raw_text": "BTP — fusion — consolidation — groupes marocains — Maroc construction",
-                "signal_type": "acquereur_actif_secteur",
-                "score_initial": 0,
-                "entreprise": None,
-            },
-            {
-                "source": "MAP",
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "titre": "Un fonds PE émirati entre au capital d'un groupe industriel marocain à hauteur de 35%",
-                "url": "https://www.mapnews.ma",
-                "raw_text": "Fonds Private Equity — entrée au capital — Industrie — Maroc — 35% participation",
-                "signal_type": "besoin_cash_bfr",
-                "score_initial": 0,
-                "entreprise": None,
-            },
-        ]
+        return [{**tpl, "date": self._today} for tpl in _DONNEES_TEST]